@@ -12,11 +12,19 @@ import json
 from ocrService import OCRService
 
 
+def create_ocr_service():
+    """Build the OCRService used to serve a request"""
+    return OCRService("medical_documents")
+
+
 class handler(BaseHTTPRequestHandler):
     """
     Vercel serverless function handler for OCR processing
     """
     
+    # Swappable so the service can run on other backends (see benchmarks/loadProcess.py)
+    service_factory = staticmethod(create_ocr_service)
+    
     def do_POST(self):
         """Handle POST requests for OCR processing"""
         try:
@@ -39,7 +47,7 @@ class handler(BaseHTTPRequestHandler):
                 return
             
             # Initialize OCR service
-            ocr_service = OCRService("medicalDocuments")
+            ocr_service = self.service_factory()
             
             # Process OCR
             result = ocr_service.process_latest_medical_report(uid)
@@ -0,0 +1,13 @@
+"""
+Benchmark Utilities - Statistics shared by the benchmark and load-test scripts
+"""
+
+import math
+from typing import List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
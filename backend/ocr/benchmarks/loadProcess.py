@@ -0,0 +1,344 @@
+"""
+OCR Load Test - Drive the api/process.py handler under concurrent users
+
+Serves the handler from a local HTTP server with OCRService running on the
+local stand-in backends, then runs closed-loop virtual users against it at
+each concurrency level and reports latency distribution, error rate and the
+saturation point (the level after which throughput stops growing).
+
+The server runs in its own process so the virtual users' threads do not
+compete with the handler for the same GIL.
+
+    python benchmarks/loadProcess.py --concurrency 10,50,200 --duration 20 --output load.json
+
+User mix profiles:
+  single   - one image in the medical report folder
+  multi    - several images in the medical report folder
+  missing  - no images (handler returns 500)
+  invalid  - request without a uid (handler returns 400)
+"""
+import sys
+import os
+
+# Add parent directory to path to import OCRService and the handler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import platform
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+from ocrConfig import LOGGING_CONFIG, STORAGE_PATHS, get_storage_path
+from ocrService import OCRService
+from localBackends import build_local_backends
+from api.process import handler
+from benchUtils import percentile
+
+
+PROFILES = ('single', 'multi', 'missing', 'invalid')
+MULTI_IMAGES = 5
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse a user mix like 'single=80,multi=15,missing=5' into weights"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in PROFILES:
+            raise ValueError(f"Unknown user profile: {name}. Available: {list(PROFILES)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def build_users(fixtures_dir: str, num_users: int, weights: Dict[str, float],
+                image_bytes: int, rng: random.Random) -> List[Dict]:
+    """Create virtual users and their fixture images according to the mix"""
+    users = []
+    profiles = list(weights.keys())
+    
+    for idx in range(num_users):
+        profile = rng.choices(profiles, weights=[weights[name] for name in profiles])[0]
+        uid = f"load_user_{idx:04d}"
+        num_images = {'single': 1, 'multi': MULTI_IMAGES}.get(profile, 0)
+        
+        if num_images:
+            folder = os.path.join(fixtures_dir, *get_storage_path(
+                'images', uid, STORAGE_PATHS['medical_report_subfolder']).strip('/').split('/'))
+            os.makedirs(folder, exist_ok=True)
+            for image_idx in range(num_images):
+                with open(os.path.join(folder, f'report_{image_idx}.jpg'), 'wb') as f:
+                    f.write(os.urandom(image_bytes))
+        
+        users.append({'uid': uid, 'profile': profile})
+    
+    return users
+
+
+def serve(fixtures_dir: str, backend_options: Dict, backlog: int, verbose: bool, ports):
+    """
+    Serve the handler on a local threaded HTTP server (server process entry point)
+    
+    Args:
+        fixtures_dir (str): Fixtures for the local backends
+        backend_options (Dict): Keyword arguments for build_local_backends
+        backlog (int): Server listen backlog
+        verbose (bool): Keep OCR service logging enabled
+        ports: Queue the bound port is reported on
+    """
+    if not verbose:
+        LOGGING_CONFIG['enabled'] = False
+    
+    backends = build_local_backends(fixtures_dir, **backend_options)
+    
+    class LocalHandler(handler):
+        service_factory = staticmethod(lambda: OCRService("medical_documents", **backends))
+        
+        def log_message(self, format, *args):
+            pass
+    
+    class Server(ThreadingHTTPServer):
+        request_queue_size = backlog
+    
+    server = Server(('127.0.0.1', 0), LocalHandler)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_server(fixtures_dir: str, backend_options: Dict, backlog: int, verbose: bool,
+                 startup_timeout: float = 60) -> Tuple[multiprocessing.Process, int]:
+    """
+    Start the handler's server in a separate process
+    
+    Returns:
+        Tuple[Process, int]: Server process and the port it listens on
+    """
+    context = multiprocessing.get_context('spawn')
+    ports = context.Queue()
+    process = context.Process(
+        target=serve,
+        args=(fixtures_dir, backend_options, backlog, verbose, ports),
+        daemon=True
+    )
+    process.start()
+    
+    try:
+        return process, ports.get(timeout=startup_timeout)
+    except Exception:
+        process.terminate()
+        raise RuntimeError(f"Load test server did not start (exit code {process.exitcode})")
+
+
+def run_level(port: int, users: List[Dict], concurrency: int, duration: float,
+              timeout: float) -> Dict:
+    """
+    Run closed-loop virtual users at one concurrency level
+    
+    Args:
+        port (int): Local server port
+        users (List[Dict]): Virtual users to draw from
+        concurrency (int): Number of concurrent virtual users
+        duration (float): Seconds to keep sending requests
+        timeout (float): Per-request timeout in seconds
+    
+    Returns:
+        Dict: Latency distribution, status counts and throughput for this level
+    """
+    samples = []
+    samples_lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    
+    def virtual_user(worker_idx: int):
+        rng = random.Random(worker_idx)
+        
+        while time.monotonic() < deadline:
+            user = rng.choice(users)
+            body = json.dumps({} if user['profile'] == 'invalid' else {'uid': user['uid']})
+            start = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+                conn.request('POST', '/api/process', body=body,
+                             headers={'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                payload = response.read()
+                status = response.status
+                conn.close()
+                
+                # The handler answers 200 even when OCR itself failed
+                if status == 200 and json.loads(payload).get('success') is False:
+                    status = 'ocr_error'
+            except Exception as e:
+                status = type(e).__name__
+            
+            sample = (user['profile'], status, time.perf_counter() - start)
+            with samples_lock:
+                samples.append(sample)
+    
+    started = time.perf_counter()
+    workers = [threading.Thread(target=virtual_user, args=(idx,)) for idx in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    
+    latencies = [latency for _, _, latency in samples]
+    ok_latencies = [latency for _, status, latency in samples if status == 200]
+    statuses = Counter(str(status) for _, status, _ in samples)
+    # 400/500 from invalid/missing users are the handler behaving correctly
+    expected = {'invalid': 400, 'missing': 500}
+    unexpected = [
+        1 for profile, status, _ in samples
+        if status != expected.get(profile, 200)
+    ]
+    
+    def distribution(values: List[float]) -> Dict:
+        if not values:
+            return {}
+        return {
+            'mean': round(sum(values) / len(values) * 1000, 2),
+            'p50': round(percentile(values, 50) * 1000, 2),
+            'p90': round(percentile(values, 90) * 1000, 2),
+            'p99': round(percentile(values, 99) * 1000, 2),
+            'max': round(max(values) * 1000, 2)
+        }
+    
+    return {
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(len(samples) / elapsed, 3) if elapsed else None,
+        'latency_ms': distribution(latencies),
+        'success_latency_ms': distribution(ok_latencies),
+        'status_counts': dict(statuses),
+        'error_rate': round(1 - statuses.get('200', 0) / len(samples), 4) if samples else None,
+        'unexpected_error_rate': round(len(unexpected) / len(samples), 4) if samples else None
+    }
+
+
+def find_saturation(levels: List[Dict], min_gain: float) -> Dict:
+    """
+    Find the concurrency level after which throughput stops growing
+    
+    Args:
+        levels (List[Dict]): Results per concurrency level, in increasing order
+        min_gain (float): Minimum relative throughput gain to count as still scaling
+    
+    Returns:
+        Dict: Saturation concurrency and peak throughput
+    """
+    peak = max(levels, key=lambda level: level['throughput_rps'] or 0)
+    saturation = None
+    
+    for previous, current in zip(levels, levels[1:]):
+        if not previous['throughput_rps']:
+            continue
+        gain = (current['throughput_rps'] - previous['throughput_rps']) / previous['throughput_rps']
+        if gain < min_gain:
+            saturation = previous['concurrency']
+            break
+    
+    return {
+        'saturation_concurrency': saturation,
+        'peak_throughput_rps': peak['throughput_rps'],
+        'peak_throughput_concurrency': peak['concurrency']
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='OCR Load Test - concurrent users against api/process.py')
+    parser.add_argument('--concurrency', type=str, default='10,50,200',
+                       help='Comma-separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per concurrency level')
+    parser.add_argument('--users', type=int, default=200, help='Number of distinct virtual users')
+    parser.add_argument('--user-mix', type=str, default='single=80,multi=15,missing=5',
+                       help=f"Profile weights, profiles: {', '.join(PROFILES)}")
+    parser.add_argument('--image-bytes', type=int, default=512 * 1024, help='Size of each synthetic image')
+    parser.add_argument('--vision-latency', type=float, default=0.3, help='Simulated Vision latency (s)')
+    parser.add_argument('--storage-latency', type=float, default=0.05, help='Simulated Storage latency (s)')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Maximum extra random latency (s)')
+    parser.add_argument('--vision-error-rate', type=float, default=0.0, help='Injected Vision error rate (0-1)')
+    parser.add_argument('--storage-error-rate', type=float, default=0.0, help='Injected Storage error rate (0-1)')
+    parser.add_argument('--firestore-error-rate', type=float, default=0.0,
+                       help='Injected Firestore error rate (0-1)')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout (s)')
+    parser.add_argument('--backlog', type=int, default=128, help='Server listen backlog')
+    parser.add_argument('--saturation-gain', type=float, default=0.1,
+                       help='Throughput gain below which the previous level counts as saturated')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--verbose', action='store_true', help='Keep OCR service logging enabled')
+    parser.add_argument('--output', type=str, help='Write JSON report to this file (default: stdout)')
+    
+    args = parser.parse_args()
+    
+    levels = sorted(int(level) for level in args.concurrency.split(','))
+    weights = parse_mix(args.user_mix)
+    rng = random.Random(args.seed)
+    work_dir = tempfile.mkdtemp(prefix='ocr_load_')
+    fixtures_dir = os.path.join(work_dir, 'fixtures')
+    os.makedirs(fixtures_dir)
+    
+    try:
+        users = build_users(fixtures_dir, args.users, weights, args.image_bytes, rng)
+        backend_options = {
+            'vision_latency': args.vision_latency,
+            'storage_latency': args.storage_latency,
+            'jitter': args.jitter,
+            'vision_error_rate': args.vision_error_rate,
+            'storage_error_rate': args.storage_error_rate,
+            'firestore_error_rate': args.firestore_error_rate,
+            'seed': args.seed,
+            # The server process is terminated, so its bucket writes must live
+            # where this process cleans up rather than in a self-removing temp dir
+            'write_dir': os.path.join(work_dir, 'writes')
+        }
+        server, port = start_server(fixtures_dir, backend_options, args.backlog, args.verbose)
+        
+        results = []
+        try:
+            for concurrency in levels:
+                print(f"Running {concurrency} concurrent users for {args.duration}s", file=sys.stderr)
+                results.append(run_level(port, users, concurrency, args.duration, args.timeout))
+        finally:
+            server.terminate()
+            server.join()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    report = {
+        'benchmark': 'ocr_process_load',
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {
+            'user_mix': weights,
+            'users': Counter(user['profile'] for user in users),
+            'image_bytes': args.image_bytes,
+            'vision_latency_s': args.vision_latency,
+            'storage_latency_s': args.storage_latency,
+            'jitter_s': args.jitter,
+            'vision_error_rate': args.vision_error_rate,
+            'storage_error_rate': args.storage_error_rate,
+            'firestore_error_rate': args.firestore_error_rate,
+            'duration_s': args.duration
+        },
+        'levels': results,
+        **find_saturation(results, args.saturation_gain)
+    }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
@@ -0,0 +1,329 @@
+"""
+OCR Benchmark - Throughput, latency and memory for the OCR pipeline
+
+Runs entirely against the local stand-in backends (no credentials, no network):
+  - format:     _format_ocr_result for each result_format on synthetic responses
+                scaled from a single block to tens of thousands of words
+  - json_dump:  save_results_to_json on the formatted results
+  - end_to_end: process_user_images with simulated Storage/Vision latency
+
+Each case runs in its own child process, so its peak RSS (ru_maxrss) belongs
+to that case alone. Results are written as JSON so runs on different commits
+can be compared:
+    python benchmarks/ocrBenchmark.py --output before.json
+    python benchmarks/ocrBenchmark.py --output after.json --compare before.json
+"""
+import sys
+import os
+
+# Add parent directory to path to import OCRService
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import gc
+import json
+import logging
+import multiprocessing
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ocrService import OCRService
+from ocrConfig import FEATURE_PLANS, RESULT_CONFIGS
+from localBackends import build_local_backends, build_synthetic_response
+from benchUtils import percentile
+
+
+# (blocks, words per block) - 1 word up to 40k words
+DOCUMENT_SIZES = [(1, 1), (10, 50), (100, 100), (400, 100)]
+QUICK_DOCUMENT_SIZES = [(1, 1), (10, 50), (50, 100)]
+
+# Large documents get fewer iterations so a full run stays in minutes
+MAX_WORDS_PER_CASE = 200000
+
+BENCH_UID = "bench_user"
+
+
+def peak_rss_kb() -> int:
+    """
+    Peak resident set size of this process in KB
+    
+    ru_maxrss is a process-lifetime high-water mark, which is why every case
+    runs in a fresh child process (see run_isolated).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def measure(fn: Callable, iterations: int, warmup: int = 1, units_per_call: int = 1) -> Dict:
+    """
+    Time a callable and measure its allocations
+    
+    Timing and allocation tracking run as separate passes so tracemalloc
+    overhead does not skew latency. Peak RSS is sampled between the two
+    passes so tracemalloc's own bookkeeping is not counted.
+    
+    Args:
+        fn (Callable): Zero-argument callable to benchmark
+        iterations (int): Number of timed calls
+        warmup (int): Untimed calls before timing
+        units_per_call (int): Work units (e.g. images) per call, for throughput
+    
+    Returns:
+        Dict: Latency, throughput and memory statistics
+    """
+    for _ in range(warmup):
+        fn()
+    
+    gc.collect()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    rss_kb = peak_rss_kb()
+    
+    # Allocation pass: one traced call, result kept alive to count what it retains
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    
+    retained = [stat for stat in after.compare_to(before, 'filename') if stat.size_diff > 0]
+    del result
+    
+    return {
+        'iterations': iterations,
+        'throughput_per_s': round(iterations * units_per_call / elapsed, 3) if elapsed else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 4),
+            'p50': round(percentile(latencies, 50) * 1000, 4),
+            'p99': round(percentile(latencies, 99) * 1000, 4),
+            'max': round(max(latencies) * 1000, 4)
+        },
+        'peak_rss_kb': rss_kb,
+        'alloc_peak_bytes': alloc_peak,
+        'alloc_retained_bytes': sum(stat.size_diff for stat in retained),
+        'alloc_retained_blocks': sum(stat.count_diff for stat in retained)
+    }
+
+
+def build_service(fixtures_dir: str, result_format: str = 'full', **backend_options) -> OCRService:
+    """Build an OCRService on local backends with console logging silenced"""
+    service = OCRService(**build_local_backends(fixtures_dir, **backend_options))
+    service.config = dict(service.config, result_format=result_format)
+    service.logger.setLevel(logging.WARNING)
+    return service
+
+
+def case_iterations(iterations: int, words: int) -> int:
+    """Scale iterations down for large documents, keeping at least 3"""
+    return max(3, min(iterations, MAX_WORDS_PER_CASE // max(words, 1)))
+
+
+def bench_format(fixtures_dir: str, num_blocks: int, words_per_block: int, result_format: str,
+                 iterations: int) -> Dict:
+    """Benchmark _format_ocr_result for one result format and document size"""
+    service = build_service(fixtures_dir)
+    response = build_synthetic_response(num_blocks, words_per_block, seed=0)
+    words = num_blocks * words_per_block
+    
+    stats = measure(
+        lambda: service._format_ocr_result(response, 'bench.jpg', result_format),
+        case_iterations(iterations, words)
+    )
+    return dict(name=f"format/{result_format}/{words}w", result_format=result_format,
+                blocks=num_blocks, words=words, **stats)
+
+
+def bench_json_dump(fixtures_dir: str, output_dir: str, num_blocks: int, words_per_block: int,
+                    iterations: int, results_per_file: int = 10) -> Dict:
+    """Benchmark save_results_to_json on formatted full-format results of one document size"""
+    service = build_service(fixtures_dir)
+    RESULT_CONFIGS['json_backup'].update(enabled=True, output_dir=output_dir)
+    
+    response = build_synthetic_response(num_blocks, words_per_block, seed=0)
+    results = [
+        service._format_ocr_result(response, f'bench_{idx}.jpg', 'full')
+        for idx in range(results_per_file)
+    ]
+    words = num_blocks * words_per_block
+    
+    stats = measure(lambda: service.save_results_to_json(BENCH_UID, results),
+                    case_iterations(iterations, words * results_per_file))
+    return dict(name=f"json_dump/full/{words}w", results=results_per_file,
+                blocks=num_blocks, words=words, **stats)
+
+
+def write_end_to_end_fixtures(fixtures_dir: str, num_images: int, image_bytes: int):
+    """Write the synthetic images the end-to-end cases process"""
+    images_dir = os.path.join(fixtures_dir, BENCH_UID, 'images')
+    os.makedirs(images_dir, exist_ok=True)
+    for idx in range(num_images):
+        with open(os.path.join(images_dir, f'scan_{idx:04d}.jpg'), 'wb') as f:
+            f.write(os.urandom(image_bytes))
+
+
+def bench_end_to_end(fixtures_dir: str, num_images: int, image_bytes: int, result_format: str,
+                     iterations: int, vision_latency: float, storage_latency: float) -> Dict:
+    """Benchmark process_user_images for one result format against simulated Storage/Vision latency"""
+    service = build_service(
+        fixtures_dir,
+        result_format=result_format,
+        vision_latency=vision_latency,
+        storage_latency=storage_latency,
+        seed=0,
+        synthetic_blocks=20,
+        words_per_block=50
+    )
+    stats = measure(lambda: service.process_user_images(BENCH_UID), iterations,
+                    warmup=0, units_per_call=num_images)
+    return dict(name=f"end_to_end/{result_format}/{num_images}img", result_format=result_format,
+                images=num_images, image_bytes=image_bytes, vision_latency_s=vision_latency,
+                storage_latency_s=storage_latency, **stats)
+
+
+def bench_baseline() -> Dict:
+    """No-op case: peak RSS of a child process that has only imported the pipeline"""
+    return {'peak_rss_kb': peak_rss_kb()}
+
+
+def run_isolated(fn: Callable, *args) -> Dict:
+    """
+    Run one benchmark case in a fresh child process
+    
+    Spawned (not forked) children start from the same imports on every
+    platform, so peak RSS is comparable across cases and commits.
+    """
+    with multiprocessing.get_context('spawn').Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(fn, args)
+
+
+def plan_cases(args: argparse.Namespace, fixtures_dir: str, work_dir: str, sizes, iterations: int,
+               e2e_iterations: int) -> List[Tuple[Callable, tuple]]:
+    """List the (case function, arguments) pairs for the selected suites"""
+    cases = []
+    
+    if args.suite in ('all', 'format'):
+        for num_blocks, words_per_block in sizes:
+            for result_format in FEATURE_PLANS:
+                cases.append((bench_format, (fixtures_dir, num_blocks, words_per_block,
+                                             result_format, iterations)))
+    
+    if args.suite in ('all', 'json_dump'):
+        output_dir = os.path.join(work_dir, 'json')
+        for num_blocks, words_per_block in sizes:
+            cases.append((bench_json_dump, (fixtures_dir, output_dir, num_blocks, words_per_block,
+                                            iterations)))
+    
+    if args.suite in ('all', 'end_to_end'):
+        write_end_to_end_fixtures(fixtures_dir, args.images, args.image_bytes)
+        for result_format in FEATURE_PLANS:
+            cases.append((bench_end_to_end, (fixtures_dir, args.images, args.image_bytes, result_format,
+                                             e2e_iterations, args.vision_latency, args.storage_latency)))
+    
+    return cases
+
+
+def git_commit() -> Optional[str]:
+    """Current git commit, if available"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(report: Dict, baseline: Dict) -> List[Dict]:
+    """Compare p50 latency, allocation peak and peak RSS per case against a baseline report"""
+    baseline_cases = {case['name']: case for case in baseline.get('cases', [])}
+    rows = []
+    
+    for case in report['cases']:
+        base = baseline_cases.get(case['name'])
+        if not base:
+            continue
+        rows.append({
+            'name': case['name'],
+            'p50_ms': case['latency_ms']['p50'],
+            'baseline_p50_ms': base['latency_ms']['p50'],
+            'p50_ratio': round(case['latency_ms']['p50'] / base['latency_ms']['p50'], 3)
+                if base['latency_ms']['p50'] else None,
+            'alloc_peak_ratio': round(case['alloc_peak_bytes'] / base['alloc_peak_bytes'], 3)
+                if base['alloc_peak_bytes'] else None,
+            'peak_rss_kb': case['peak_rss_kb'],
+            'baseline_peak_rss_kb': base.get('peak_rss_kb'),
+            'peak_rss_ratio': round(case['peak_rss_kb'] / base['peak_rss_kb'], 3)
+                if base.get('peak_rss_kb') else None
+        })
+    
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='OCR Benchmark - pipeline throughput, latency and memory')
+    parser.add_argument('--suite', choices=['all', 'format', 'json_dump', 'end_to_end'], default='all',
+                       help='Which benchmarks to run')
+    parser.add_argument('--iterations', type=int, default=20, help='Timed iterations per case')
+    parser.add_argument('--e2e-iterations', type=int, default=30,
+                       help='Timed process_user_images runs per end-to-end case')
+    parser.add_argument('--quick', action='store_true', help='Smaller documents and fewer iterations')
+    parser.add_argument('--images', type=int, default=20, help='Images per end-to-end run')
+    parser.add_argument('--image-bytes', type=int, default=512 * 1024, help='Size of each synthetic image')
+    parser.add_argument('--vision-latency', type=float, default=0.05, help='Simulated Vision latency (s)')
+    parser.add_argument('--storage-latency', type=float, default=0.01, help='Simulated Storage latency (s)')
+    parser.add_argument('--output', type=str, help='Write JSON report to this file (default: stdout)')
+    parser.add_argument('--compare', type=str, help='Baseline JSON report to compare against')
+    
+    args = parser.parse_args()
+    
+    sizes = QUICK_DOCUMENT_SIZES if args.quick else DOCUMENT_SIZES
+    iterations = min(args.iterations, 5) if args.quick else args.iterations
+    e2e_iterations = min(args.e2e_iterations, 10) if args.quick else args.e2e_iterations
+    work_dir = tempfile.mkdtemp(prefix='ocr_bench_')
+    fixtures_dir = os.path.join(work_dir, 'fixtures')
+    os.makedirs(fixtures_dir)
+    
+    try:
+        baseline_rss_kb = run_isolated(bench_baseline)['peak_rss_kb']
+        cases = [
+            run_isolated(fn, *fn_args)
+            for fn, fn_args in plan_cases(args, fixtures_dir, work_dir, sizes, iterations, e2e_iterations)
+        ]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    report = {
+        'benchmark': 'ocr_pipeline',
+        'timestamp': datetime.utcnow().isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'baseline_rss_kb': baseline_rss_kb,  # Peak RSS of a case process before any work
+        'cases': cases
+    }
+    
+    if args.compare:
+        with open(args.compare) as f:
+            report['comparison'] = compare(report, json.load(f))
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,543 @@
+"""
+Local Backends - In-process stand-ins for Vision, Storage and Firestore
+
+Lets OCRService run without Google credentials or network access, for
+testing, benchmarking and load-testing the pipeline deterministically.
+
+Fixture layout (root of a LocalBucket mirrors the Firebase Storage bucket):
+    fixtures/{uid}/images/scan.jpg
+    fixtures/{uid}/images/scan.jpg.json   <- optional recorded AnnotateImageResponse
+
+Example:
+    service = OCRService(**build_local_backends('./fixtures', vision_latency=0.2))
+"""
+
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from google.api_core import exceptions as api_exceptions
+from google.cloud.vision_v1 import types
+
+
+def build_synthetic_response(num_blocks: int = 4, words_per_block: int = 12,
+                             confidence: float = 0.95, seed: Optional[int] = None):
+    """
+    Build a synthetic AnnotateImageResponse shaped like DOCUMENT_TEXT_DETECTION output
+    
+    Args:
+        num_blocks (int): Number of text blocks on the page
+        words_per_block (int): Number of words in each block
+        confidence (float): Base confidence for blocks and words
+        seed (int): Optional random seed for reproducible word lengths
+    
+    Returns:
+        AnnotateImageResponse: Synthetic response
+    """
+    rng = random.Random(seed)
+    vocabulary = ['glucose', 'mg/dL', 'result', 'range', 'patient', 'ref', 'HbA1c',
+                  'cholesterol', 'LDL', 'HDL', '5.4', '120', 'normal', 'high', 'low']
+    
+    blocks = []
+    block_texts = []
+    
+    for _ in range(num_blocks):
+        words = []
+        word_texts = []
+        
+        for _ in range(words_per_block):
+            word_text = rng.choice(vocabulary)
+            word_texts.append(word_text)
+            words.append(types.Word(
+                symbols=[types.Symbol(text=char, confidence=confidence) for char in word_text],
+                confidence=confidence
+            ))
+        
+        block_texts.append(" ".join(word_texts))
+        blocks.append(types.Block(
+            paragraphs=[types.Paragraph(words=words, confidence=confidence)],
+            confidence=confidence
+        ))
+    
+    full_text = "\n".join(block_texts) + "\n"
+    
+    # Like the real API: first annotation is the full text, then one per word
+    text_annotations = [types.EntityAnnotation(description=full_text, locale='en')]
+    text_annotations.extend(
+        types.EntityAnnotation(description=word)
+        for block_text in block_texts
+        for word in block_text.split(" ")
+    )
+    
+    return types.AnnotateImageResponse(
+        full_text_annotation=types.TextAnnotation(
+            text=full_text,
+            pages=[types.Page(blocks=blocks, confidence=confidence)]
+        ),
+        text_annotations=text_annotations
+    )
+
+
+class FaultInjector:
+    """
+    Simulated latency and error injection shared by the local backends
+    """
+    
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialize fault injector
+        
+        Args:
+            latency (float): Base delay per call in seconds
+            jitter (float): Maximum extra random delay per call in seconds
+            error_rate (float): Probability (0-1) that a call fails
+            seed (int): Optional random seed for deterministic runs
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    
+    def draw(self) -> Tuple[float, bool]:
+        """Draw the simulated latency and failure decision for one call, without sleeping"""
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        return delay, fail
+    
+    
+    def should_fail(self) -> bool:
+        """Sleep for the simulated latency and decide whether this call fails"""
+        delay, fail = self.draw()
+        if delay:
+            time.sleep(delay)
+        return fail
+    
+    
+    def apply(self, operation: str):
+        """Sleep for the simulated latency and raise if this call is chosen to fail"""
+        if self.should_fail():
+            raise api_exceptions.ServiceUnavailable(f"Injected failure in {operation}")
+
+
+class LocalBlob:
+    """
+    Blob backed by a file under a LocalBucket root
+    
+    Reads see the bucket's write directory layered over its fixtures;
+    writes only ever go to the write directory.
+    """
+    
+    def __init__(self, bucket: "LocalBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+        self.write_path = os.path.join(bucket.write_dir, *name.split('/'))
+        self.path = (
+            self.write_path if os.path.exists(self.write_path)
+            else os.path.join(bucket.root_dir, *name.split('/'))
+        )
+    
+    
+    @property
+    def size(self) -> Optional[int]:
+        """Size in bytes, or None if the blob does not exist"""
+        return os.path.getsize(self.path) if os.path.exists(self.path) else None
+    
+    
+    @property
+    def time_created(self) -> Optional[datetime]:
+        """Creation time (file modification time), or None if the blob does not exist"""
+        if not os.path.exists(self.path):
+            return None
+        return datetime.fromtimestamp(os.path.getmtime(self.path), tz=timezone.utc)
+    
+    
+    @property
+    def updated(self) -> Optional[datetime]:
+        return self.time_created
+    
+    
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+    
+    
+    def download_as_bytes(self) -> bytes:
+        self.bucket.faults.apply(f"download {self.name}")
+        
+        if not os.path.exists(self.path):
+            raise api_exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        
+        with open(self.path, 'rb') as f:
+            return f.read()
+    
+    
+    def reload(self):
+        """Fetch metadata; raises NotFound like the real client"""
+        self.bucket.faults.apply(f"reload {self.name}")
+        
+        if not os.path.exists(self.path):
+            raise api_exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+    
+    
+    def download_as_text(self) -> str:
+        return self.download_as_bytes().decode('utf-8')
+    
+    
+    def upload_from_string(self, data, content_type: Optional[str] = None):
+        self.bucket.faults.apply(f"upload {self.name}")
+        
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        
+        os.makedirs(os.path.dirname(self.write_path), exist_ok=True)
+        with open(self.write_path, 'wb') as f:
+            f.write(data)
+        self.path = self.write_path
+    
+    
+    def delete(self):
+        self.bucket.faults.apply(f"delete {self.name}")
+        
+        if os.path.exists(self.write_path):
+            os.remove(self.write_path)
+        elif os.path.exists(self.path):
+            raise api_exceptions.Forbidden(f"Fixture objects are read-only: {self.bucket.name}/{self.name}")
+        else:
+            raise api_exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+
+
+class LocalBucket:
+    """
+    Storage bucket backed by a local directory
+    
+    Fixtures are read-only: uploads (including async annotation outputs)
+    land in a separate write directory, a temporary one by default that is
+    removed when the bucket is garbage collected.
+    """
+    
+    def __init__(self, root_dir: str, name: str = "local-bucket", latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None,
+                 write_dir: Optional[str] = None):
+        """
+        Initialize local bucket
+        
+        Args:
+            root_dir (str): Directory whose contents are served as blobs
+            name (str): Bucket name used in gs:// URIs
+            latency, jitter, error_rate, seed: See FaultInjector
+            write_dir (str): Directory uploads are written to (default: temporary)
+        """
+        self.root_dir = os.path.abspath(root_dir)
+        self.name = name
+        self.faults = FaultInjector(latency, jitter, error_rate, seed)
+        
+        if write_dir is None:
+            write_dir = tempfile.mkdtemp(prefix='ocr_local_bucket_')
+            weakref.finalize(self, shutil.rmtree, write_dir, True)
+        self.write_dir = os.path.abspath(write_dir)
+    
+    
+    def blob(self, blob_name: str) -> LocalBlob:
+        return LocalBlob(self, blob_name)
+    
+    
+    def list_blobs(self, prefix: Optional[str] = None) -> List[LocalBlob]:
+        self.faults.apply(f"list {prefix}")
+        
+        # Only walk the directory holding the prefix, not the whole bucket
+        prefix_dir = prefix.rsplit('/', 1)[0].split('/') if prefix and '/' in prefix else []
+        
+        names = set()
+        for root in (self.root_dir, self.write_dir):
+            for dirpath, _, filenames in os.walk(os.path.join(root, *prefix_dir)):
+                for filename in filenames:
+                    rel_path = os.path.relpath(os.path.join(dirpath, filename), root)
+                    name = rel_path.replace(os.sep, '/')
+                    if not prefix or name.startswith(prefix):
+                        names.add(name)
+        
+        return [LocalBlob(self, name) for name in sorted(names)]
+
+
+class LocalOperation:
+    """
+    Stand-in for the long-running operation returned by async_batch_annotate_files
+    """
+    
+    def __init__(self, duration: float, error: Optional[Exception] = None):
+        self._finish_at = time.monotonic() + duration
+        self._error = error
+    
+    
+    def done(self) -> bool:
+        return time.monotonic() >= self._finish_at
+    
+    
+    def result(self, timeout: Optional[float] = None):
+        remaining = self._finish_at - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        if self._error:
+            raise self._error
+        return None
+
+
+class LocalVisionClient:
+    """
+    Vision client returning recorded or synthetic AnnotateImageResponse payloads
+    
+    Recorded responses are looked up by image content: for every fixture
+    `name.ext` with a sidecar `name.ext.json` under recordings_dir, requests
+    carrying the same bytes get that response. Anything else gets a
+    synthetic response. Requests by gs:// image_uri are read from the bucket.
+    """
+    
+    def __init__(self, recordings_dir: Optional[str] = None, bucket: Optional[LocalBucket] = None,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_mode: str = "response", seed: Optional[int] = None,
+                 synthetic_blocks: int = 4, words_per_block: int = 12, file_pages: int = 3):
+        """
+        Initialize local Vision client
+        
+        Args:
+            recordings_dir (str): Optional directory of fixtures with recorded .json sidecars
+            bucket (LocalBucket): Bucket image_uri requests read from and async file annotation writes to
+            latency, jitter, error_rate, seed: See FaultInjector
+            error_mode (str): 'response' sets response.error, 'raise' raises like a transport error
+            synthetic_blocks (int): Blocks per synthetic response
+            words_per_block (int): Words per block in synthetic responses
+            file_pages (int): Pages reported for each async annotated file
+        """
+        self.bucket = bucket
+        self.error_mode = error_mode
+        self.file_pages = file_pages
+        self.faults = FaultInjector(latency, jitter, error_rate, seed)
+        
+        # Responses are kept serialized so each call deserializes a fresh
+        # message, like the real client does
+        self._recorded = self._load_recordings(recordings_dir) if recordings_dir else {}
+        self._synthetic = types.AnnotateImageResponse.serialize(
+            build_synthetic_response(synthetic_blocks, words_per_block, seed=seed)
+        )
+        
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+    
+    
+    def _load_recordings(self, recordings_dir: str) -> Dict[str, bytes]:
+        """Map sha256 of each fixture's bytes to its serialized recorded response"""
+        recorded = {}
+        
+        for dirpath, _, filenames in os.walk(recordings_dir):
+            for filename in filenames:
+                if not filename.endswith('.json'):
+                    continue
+                
+                fixture_path = os.path.join(dirpath, filename[:-len('.json')])
+                if not os.path.isfile(fixture_path):
+                    continue
+                
+                with open(fixture_path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+                with open(os.path.join(dirpath, filename), 'r') as f:
+                    response = types.AnnotateImageResponse.from_json(f.read(), ignore_unknown_fields=True)
+                
+                recorded[digest] = types.AnnotateImageResponse.serialize(response)
+        
+        return recorded
+    
+    
+    def annotate_image(self, request, **kwargs):
+        with self._calls_lock:
+            self.calls += 1
+        
+        if self.faults.should_fail():
+            if self.error_mode == 'raise':
+                raise api_exceptions.ServiceUnavailable("Injected Vision API failure")
+            return types.AnnotateImageResponse(error={'code': 14, 'message': "Injected Vision API failure"})
+        
+        content = request.image.content
+        image_uri = request.image.source.image_uri
+        if image_uri:
+            # Vision reads the image from Storage itself
+            blob = self._resolve_image_uri(image_uri)
+            if blob is None or not blob.exists():
+                return types.AnnotateImageResponse(error={'code': 7, 'message': f"Cannot read image: {image_uri}"})
+            if self._recorded:
+                content = blob.download_as_bytes()
+        
+        payload = self._synthetic
+        if self._recorded:
+            digest = hashlib.sha256(content).hexdigest()
+            payload = self._recorded.get(digest, payload)
+        
+        return types.AnnotateImageResponse.deserialize(payload)
+    
+    
+    def _resolve_image_uri(self, image_uri: str) -> Optional[LocalBlob]:
+        """Map a gs:// URI in the local bucket to its blob, or None"""
+        prefix = f"gs://{self.bucket.name}/" if self.bucket is not None else None
+        if prefix is None or not image_uri.startswith(prefix):
+            return None
+        return self.bucket.blob(image_uri[len(prefix):])
+    
+    
+    def batch_annotate_images(self, request=None, requests=None, **kwargs):
+        requests = request.requests if request is not None else requests
+        return types.BatchAnnotateImagesResponse(
+            responses=[self.annotate_image(image_request) for image_request in requests]
+        )
+    
+    
+    def async_batch_annotate_files(self, requests, **kwargs):
+        if self.bucket is None:
+            raise ValueError("LocalVisionClient needs a bucket for async file annotation")
+        
+        # Latency is spent by the operation, not by this call
+        delay, fail = self.faults.draw()
+        page = types.AnnotateImageResponse.deserialize(self._synthetic)
+        
+        for request in requests:
+            uri = request.output_config.gcs_destination.uri
+            output_prefix = uri.split(f"gs://{self.bucket.name}/", 1)[-1]
+            pages_per_file = request.output_config.batch_size or 20
+            
+            for first in range(1, self.file_pages + 1, pages_per_file):
+                last = min(first + pages_per_file - 1, self.file_pages)
+                responses = []
+                for page_number in range(first, last + 1):
+                    response = types.AnnotateImageResponse(page)
+                    response.context = types.ImageAnnotationContext(
+                        uri=request.input_config.gcs_source.uri,
+                        page_number=page_number
+                    )
+                    responses.append(response)
+                
+                file_response = types.AnnotateFileResponse(
+                    input_config=request.input_config,
+                    responses=responses,
+                    total_pages=self.file_pages
+                )
+                self.bucket.blob(f"{output_prefix}output-{first}-to-{last}.json").upload_from_string(
+                    types.AnnotateFileResponse.to_json(file_response),
+                    content_type='application/json'
+                )
+        
+        error = api_exceptions.ServiceUnavailable("Injected Vision file annotation failure") if fail else None
+        return LocalOperation(delay, error)
+
+
+class LocalDocumentReference:
+    """In-memory Firestore document"""
+    
+    def __init__(self, store: "LocalFirestore", path: str):
+        self.store = store
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+    
+    
+    def collection(self, collection_id: str) -> "LocalCollectionReference":
+        return LocalCollectionReference(self.store, f"{self.path}/{collection_id}")
+    
+    
+    def set(self, document_data: Dict, merge: bool = False):
+        self.store.faults.apply(f"set {self.path}")
+        
+        with self.store.lock:
+            if merge and self.path in self.store.documents:
+                self.store.documents[self.path].update(document_data)
+            else:
+                self.store.documents[self.path] = dict(document_data)
+    
+    
+    def get(self) -> Optional[Dict]:
+        return self.store.documents.get(self.path)
+
+
+class LocalCollectionReference:
+    """In-memory Firestore collection"""
+    
+    def __init__(self, store: "LocalFirestore", path: str):
+        self.store = store
+        self.path = path
+    
+    
+    def document(self, document_id: str) -> LocalDocumentReference:
+        return LocalDocumentReference(self.store, f"{self.path}/{document_id}")
+
+
+class LocalFirestore:
+    """
+    In-memory Firestore client; documents are kept in a dict keyed by path
+    """
+    
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        self.documents: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.faults = FaultInjector(latency, jitter, error_rate, seed)
+    
+    
+    def collection(self, collection_id: str) -> LocalCollectionReference:
+        return LocalCollectionReference(self, collection_id)
+
+
+def build_local_backends(fixtures_dir: str, vision_latency: float = 0.0, storage_latency: float = 0.0,
+                         firestore_latency: float = 0.0, jitter: float = 0.0, vision_error_rate: float = 0.0,
+                         storage_error_rate: float = 0.0, firestore_error_rate: float = 0.0,
+                         seed: Optional[int] = None, write_dir: Optional[str] = None,
+                         **vision_options) -> Dict:
+    """
+    Build a matching set of local backends for OCRService
+    
+    Args:
+        fixtures_dir (str): Directory served as the storage bucket (and recordings)
+        vision_latency (float): Simulated Vision API latency in seconds
+        storage_latency (float): Simulated Storage latency in seconds
+        firestore_latency (float): Simulated Firestore latency in seconds
+        jitter (float): Maximum extra random delay per call in seconds
+        vision_error_rate (float): Probability (0-1) that a Vision call fails
+        storage_error_rate (float): Probability (0-1) that a Storage call fails
+        firestore_error_rate (float): Probability (0-1) that a Firestore write fails
+        seed (int): Optional random seed for deterministic runs
+        write_dir (str): Directory bucket uploads go to (default: temporary, see LocalBucket)
+        **vision_options: Extra LocalVisionClient options
+    
+    Returns:
+        Dict: Keyword arguments for OCRService (vision_client, bucket, db)
+    """
+    bucket = LocalBucket(
+        fixtures_dir,
+        latency=storage_latency,
+        jitter=jitter,
+        error_rate=storage_error_rate,
+        seed=seed,
+        write_dir=write_dir
+    )
+    vision_client = LocalVisionClient(
+        recordings_dir=fixtures_dir,
+        bucket=bucket,
+        latency=vision_latency,
+        jitter=jitter,
+        error_rate=vision_error_rate,
+        seed=seed,
+        **vision_options
+    )
+    db = LocalFirestore(
+        latency=firestore_latency,
+        jitter=jitter,
+        error_rate=firestore_error_rate,
+        seed=seed
+    )
+    
+    return {'vision_client': vision_client, 'bucket': bucket, 'db': db}
@@ -0,0 +1,85 @@
+"""
+OCR Backends - Interfaces OCRService expects from Vision, Storage and Firestore
+
+The production backends are the Google Cloud Vision client and the Firebase
+Admin storage bucket / Firestore client. Any object implementing these
+interfaces can be passed to OCRService instead (see localBackends.py).
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Protocol
+
+
+class VisionClient(Protocol):
+    """Subset of vision_v1.ImageAnnotatorClient used by OCRService"""
+    
+    def batch_annotate_images(self, request, **kwargs):
+        """Annotate a BatchAnnotateImagesRequest, returning a BatchAnnotateImagesResponse"""
+        ...
+    
+    def async_batch_annotate_files(self, requests, **kwargs):
+        """Start an async file annotation job, returning an operation"""
+        ...
+
+
+class StorageBlob(Protocol):
+    """Subset of google.cloud.storage.Blob used by OCRService"""
+    
+    name: str
+    size: Optional[int]
+    time_created: Optional[datetime]
+    updated: Optional[datetime]
+    
+    def reload(self):
+        """Fetch the blob's metadata (size)"""
+        ...
+    
+    def download_as_bytes(self) -> bytes:
+        """Download the blob contents"""
+        ...
+    
+    def delete(self):
+        """Delete the blob"""
+        ...
+
+
+class StorageBucket(Protocol):
+    """Subset of google.cloud.storage.Bucket used by OCRService"""
+    
+    name: str
+    
+    def blob(self, blob_name: str) -> StorageBlob:
+        """Get a blob handle by name"""
+        ...
+    
+    def list_blobs(self, prefix: Optional[str] = None) -> Iterable[StorageBlob]:
+        """List blobs under a prefix"""
+        ...
+
+
+class DocumentReference(Protocol):
+    """Subset of firestore.DocumentReference used by OCRService"""
+    
+    def collection(self, collection_id: str) -> "CollectionReference":
+        """Get a subcollection of this document"""
+        ...
+    
+    def set(self, document_data: Dict[str, Any], merge: bool = False):
+        """Write the document"""
+        ...
+
+
+class CollectionReference(Protocol):
+    """Subset of firestore.CollectionReference used by OCRService"""
+    
+    def document(self, document_id: str) -> DocumentReference:
+        """Get a document in this collection"""
+        ...
+
+
+class DocumentStore(Protocol):
+    """Subset of firestore.Client used by OCRService"""
+    
+    def collection(self, collection_id: str) -> CollectionReference:
+        """Get a top-level collection"""
+        ...
@@ -20,9 +20,12 @@ FIREBASE_SERVICE_KEY_JSON = os.getenv("FIREBASE_SERVICE_KEY")
 STORAGE_PATHS = {
     "root_folder": "",  # No root folder prefix - files are directly under {uid}/
     "images_subfolder": "images",
+    "medical_report_subfolder": "medical_report",
     "results_collection": "ocr_results",
+    "vision_output_subfolder": "vision_output",
     # Complete path: {uid}/images/
     # Results path: {uid}/ocr_results/
+    # Async file annotation output path: {uid}/ocr_results/vision_output/
 }
 
 # OCR Processing Configuration
@@ -30,10 +33,7 @@ OCR_CONFIGS = {
     "medical_documents": {
         "name": "Medical Document OCR",
         "description": "Extract text from medical documents, prescriptions, lab reports",
-        "vision_features": [
-            {"type_": "DOCUMENT_TEXT_DETECTION"},
-            {"type_": "TEXT_DETECTION"}
-        ],
+        "feature_plan": "format",  # format (derived from result_format), adaptive
         "language_hints": ["en"],
         "batch_size": 10,  # Process 10 images at a time
         "timeout": 30,  # API call timeout in seconds
@@ -41,6 +41,49 @@ OCR_CONFIGS = {
     },
 }
 
+# Vision features each result format actually reads from the response.
+# DOCUMENT_TEXT_DETECTION populates both full_text_annotation and
+# text_annotations, so no format needs TEXT_DETECTION on top of it.
+FEATURE_PLANS = {
+    "text_only": ["DOCUMENT_TEXT_DETECTION"],
+    "structured": ["DOCUMENT_TEXT_DETECTION"],
+    "full": ["DOCUMENT_TEXT_DETECTION"],
+}
+
+# Feature plan types a config can declare
+FEATURE_PLAN_TYPES = ("format", "adaptive")
+
+# Adaptive feature plan: run the cheap detector first and escalate to the
+# result format's plan only when the page looks like a dense document
+ADAPTIVE_FEATURE_PLAN = {
+    "initial_feature": "TEXT_DETECTION",
+    "escalate_min_blocks": 8,  # Escalate when TEXT_DETECTION finds this many blocks
+    "escalate_min_confidence": 0.85  # Escalate when mean block confidence is below this
+}
+
+# Multi-page file (PDF/TIFF) Configuration - processed via Vision async file annotation
+ASYNC_FILE_CONFIG = {
+    "mime_types": {
+        ".pdf": "application/pdf",
+        ".tif": "image/tiff",
+        ".tiff": "image/tiff"
+    },
+    "pages_per_output_file": 20,  # Pages per sharded JSON output written by Vision
+    "keep_outputs": False,  # Keep Vision's JSON outputs in the bucket after they are read
+    "poll_initial_delay": 1,  # seconds
+    "poll_max_delay": 30,  # seconds
+    "poll_backoff": 2,  # Multiplier applied to the delay after each poll
+    "poll_timeout": 600  # seconds
+}
+
+# Memory Configuration - bounds image bytes held while images are processed
+MEMORY_CONFIG = {
+    "inflight_byte_budget": 64 * 1024 * 1024,  # Max image bytes in flight across this process
+    "budget_timeout": 300,  # seconds to wait for budget before failing the image
+    "image_copies": 3,  # Peak copies of an image while annotated: download, request, serialized request
+    "image_uri_threshold": 8 * 1024 * 1024  # Blobs larger than this are read by Vision straight from Storage
+}
+
 # Result Processing Configuration
 RESULT_CONFIGS = {
     "firestore": {
@@ -80,6 +123,17 @@ LOGGING_CONFIG = {
     "log_file": "./ocr_service.log"
 }
 
+# Profiling Configuration (opt-in, see ocrProfiler.py)
+PROFILING_CONFIG = {
+    "enabled": False,  # Same as OCRService(profile=True) / --profile
+    "output_dir": None,  # None = next to the results (json_backup output_dir)
+    "sort_key": "cumulative",  # pstats sort key for the hotspot report
+    "top_n": 40,  # Functions in the hotspot report
+    "memory_top_n": 20,  # Allocation sites in the memory report
+    "tracemalloc_frames": 1,
+    "sample_image_timing": True  # Record per-image CPU vs wall time
+}
+
 
 def validate_firebase_credentials():
     """
@@ -136,15 +190,44 @@ def get_ocr_config(config_type="medical_documents"):
     config = OCR_CONFIGS.get(config_type)
     if not config:
         raise ValueError(f"Unknown OCR config type: {config_type}. Available: {list(OCR_CONFIGS.keys())}")
+    
+    # Fail on a bad feature_plan / result_format here rather than once per image
+    get_vision_features(config)
     return config
 
 
+def get_vision_features(config):
+    """
+    Get the Vision feature types to request for an OCR configuration
+    
+    An explicit 'vision_features' list takes precedence; otherwise the
+    features are derived from what the config's result_format consumes.
+    
+    Args:
+        config (dict): OCR configuration
+    
+    Returns:
+        list: Vision feature type names
+    """
+    feature_plan = config.get("feature_plan", "format")
+    if feature_plan not in FEATURE_PLAN_TYPES:
+        raise ValueError(f"Unknown feature plan: {feature_plan}. Available: {list(FEATURE_PLAN_TYPES)}")
+    
+    if config.get("vision_features"):
+        return [feature["type_"] for feature in config["vision_features"]]
+    
+    result_format = config.get("result_format", "full")
+    if result_format not in FEATURE_PLANS:
+        raise ValueError(f"Unknown result format: {result_format}. Available: {list(FEATURE_PLANS.keys())}")
+    return FEATURE_PLANS[result_format]
+
+
 def get_storage_path(path_type, uid=None, subfolder=None):
     """
     Build storage paths dynamically
     
     Args:
-        path_type (str): Type of path (images, results)
+        path_type (str): Type of path (images, results, vision_output)
         uid (str): User ID
         subfolder (str): Optional subfolder
     
@@ -177,6 +260,13 @@ def get_storage_path(path_type, uid=None, subfolder=None):
                 return f"{uid}/{results_collection}/"
         return results_collection
     
+    elif path_type == "vision_output":
+        results_path = get_storage_path("results", uid)
+        output_folder = STORAGE_PATHS["vision_output_subfolder"]
+        if uid:
+            return f"{results_path}{output_folder}/"
+        return f"{results_path}/{output_folder}/"
+    
     else:
         raise ValueError(f"Unknown path type: {path_type}")
 
@@ -197,3 +287,4 @@ if __name__ == "__main__":
     print(f"\n Example Storage Paths:")
     print(f"  Images: {get_storage_path('images', 'test_user', 'medical')}")
     print(f"  Results: {get_storage_path('results', 'test_user')}")
+    print(f"  Vision output: {get_storage_path('vision_output', 'test_user')}")
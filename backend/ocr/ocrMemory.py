@@ -0,0 +1,72 @@
+"""
+OCR Memory - Bounds the image bytes held in memory while images are processed
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from ocrConfig import MEMORY_CONFIG
+
+
+class ByteBudget:
+    """
+    Process-wide budget for image bytes held in flight
+    
+    Callers reserve the memory an image will take (its size times the copies
+    held while it is annotated) before downloading it and block until enough
+    of the budget is free, so concurrent downloads apply backpressure instead
+    of growing memory without bound.
+    """
+    
+    def __init__(self, limit: int):
+        """
+        Initialize byte budget
+        
+        Args:
+            limit (int): Maximum bytes that may be reserved at once
+        """
+        self.limit = limit
+        self.in_use = 0
+        self._condition = threading.Condition()
+    
+    
+    @contextmanager
+    def reserve(self, num_bytes: int, timeout: Optional[float] = None):
+        """
+        Reserve bytes for the duration of the block
+        
+        A single reservation larger than the whole budget is capped at the
+        limit, so it waits for everything else to drain instead of deadlocking.
+        
+        Args:
+            num_bytes (int): Bytes to reserve
+            timeout (float): Seconds to wait for the budget, None waits forever
+        """
+        num_bytes = min(max(num_bytes, 0), self.limit)
+        
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.in_use + num_bytes <= self.limit, timeout):
+                raise TimeoutError(f"Timed out waiting for {num_bytes} bytes of in-flight image budget")
+            self.in_use += num_bytes
+        
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_use -= num_bytes
+                self._condition.notify_all()
+
+
+_inflight_budget = None
+_inflight_budget_lock = threading.Lock()
+
+
+def get_inflight_budget() -> ByteBudget:
+    """Get the byte budget shared by every OCRService in this process"""
+    global _inflight_budget
+    
+    with _inflight_budget_lock:
+        if _inflight_budget is None:
+            _inflight_budget = ByteBudget(MEMORY_CONFIG['inflight_byte_budget'])
+        return _inflight_budget
@@ -0,0 +1,215 @@
+"""
+OCR Profiler - Opt-in cProfile/tracemalloc instrumentation for OCR runs
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+# tracemalloc is process-global: overlapping profiled runs share one tracing
+# session, started by the first and stopped by the last
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _acquire_tracemalloc(frames: int):
+    """Start tracemalloc for a profiled run unless it is already running"""
+    global _tracemalloc_users, _tracemalloc_owned
+    
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            # Leave tracing started by someone else (e.g. a benchmark) alone
+            _tracemalloc_owned = not tracemalloc.is_tracing()
+            if _tracemalloc_owned:
+                tracemalloc.start(frames)
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc():
+    """Snapshot traced memory and stop tracemalloc once the last profiled run ends"""
+    global _tracemalloc_users, _tracemalloc_owned
+    
+    with _tracemalloc_lock:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_traced = tracemalloc.get_traced_memory()
+        
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+    
+    return snapshot, peak_traced
+
+
+class RunProfiler:
+    """
+    Context manager that profiles a run and writes hotspot and memory reports
+    
+    Reports written to output_dir on exit:
+        {label}_{timestamp}.prof           raw cProfile stats (for snakeviz/pstats)
+        {label}_{timestamp}_hotspots.txt   functions sorted by sort_key
+        {label}_{timestamp}_memory.txt     top allocation sites still held at the end
+        {label}_{timestamp}_profile.json   summary with per-image CPU vs wall time
+    """
+    
+    def __init__(self, output_dir: str, label: str, sort_key: str = "cumulative", top_n: int = 40,
+                 memory_top_n: int = 20, tracemalloc_frames: int = 1, sample_images: bool = True):
+        """
+        Initialize run profiler
+        
+        Args:
+            output_dir (str): Directory reports are written to
+            label (str): Prefix for report file names
+            sort_key (str): pstats sort key for the hotspot report
+            top_n (int): Number of functions in the hotspot report
+            memory_top_n (int): Number of allocation sites in the memory report
+            tracemalloc_frames (int): Stack frames tracemalloc keeps per allocation
+            sample_images (bool): Record per-image CPU and wall time
+        """
+        self.output_dir = output_dir
+        self.label = label
+        self.sort_key = sort_key
+        self.top_n = top_n
+        self.memory_top_n = memory_top_n
+        self.tracemalloc_frames = tracemalloc_frames
+        self.sample_images = sample_images
+        
+        self.image_timings: List[Dict] = []
+        self.summary: Optional[Dict] = None
+        self._profiler = cProfile.Profile()
+        self._lock = threading.Lock()
+    
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+    
+    
+    def start(self):
+        """Start profiling"""
+        _acquire_tracemalloc(self.tracemalloc_frames)
+        
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        
+        try:
+            self._profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this interpreter; keep the
+            # memory and timing reports and skip the CPU hotspots
+            self._profiler = None
+    
+    
+    def stop(self) -> Dict:
+        """
+        Stop profiling and write the reports
+        
+        tracemalloc is always released, even if writing the reports fails.
+        
+        Returns:
+            Dict: Run summary
+        """
+        if self._profiler is not None:
+            self._profiler.disable()
+        wall_time = time.perf_counter() - self._wall_start
+        cpu_time = time.process_time() - self._cpu_start
+        
+        snapshot, peak_traced = _release_tracemalloc()
+        
+        self.summary = self._write_reports(snapshot, wall_time, cpu_time, peak_traced)
+        return self.summary
+    
+    
+    @contextmanager
+    def image(self, image_path: str):
+        """
+        Record CPU vs wall time for one image
+        
+        Wall time minus CPU time is time spent waiting, mostly on Storage and
+        Vision network calls. CPU time is measured per thread.
+        """
+        if not self.sample_images:
+            yield
+            return
+        
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.thread_time() - cpu_start
+            with self._lock:
+                self.image_timings.append({
+                    'file_path': image_path,
+                    'wall_s': round(wall_time, 6),
+                    'cpu_s': round(cpu_time, 6),
+                    'wait_s': round(max(wall_time - cpu_time, 0.0), 6)
+                })
+    
+    
+    def _write_reports(self, snapshot, wall_time: float, cpu_time: float, peak_traced: int) -> Dict:
+        """Write the profile, hotspot, memory and summary reports"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        base_path = os.path.join(self.output_dir, f"{self.label}_{timestamp}")
+        
+        paths = {
+            'memory': f"{base_path}_memory.txt",
+            'summary': f"{base_path}_profile.json"
+        }
+        
+        # CPU hotspots
+        if self._profiler is not None:
+            paths['profile'] = f"{base_path}.prof"
+            paths['hotspots'] = f"{base_path}_hotspots.txt"
+            
+            self._profiler.dump_stats(paths['profile'])
+            stream = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=stream)
+            stats.strip_dirs().sort_stats(self.sort_key).print_stats(self.top_n)
+            with open(paths['hotspots'], 'w') as f:
+                f.write(stream.getvalue())
+        
+        # Memory top-N, ignoring tracemalloc's own bookkeeping
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+        ])
+        top_stats = snapshot.statistics('lineno')
+        with open(paths['memory'], 'w') as f:
+            f.write(f"Peak traced memory: {peak_traced / 1024:.1f} KiB\n")
+            f.write(f"Top {self.memory_top_n} allocation sites held at end of run:\n\n")
+            for stat in top_stats[:self.memory_top_n]:
+                f.write(f"{stat}\n")
+        
+        summary = {
+            'label': self.label,
+            'wall_s': round(wall_time, 6),
+            'cpu_s': round(cpu_time, 6),
+            'peak_traced_bytes': peak_traced,  # Process-wide while runs overlap
+            'num_images': len(self.image_timings),
+            'image_wall_s': round(sum(timing['wall_s'] for timing in self.image_timings), 6),
+            'image_cpu_s': round(sum(timing['cpu_s'] for timing in self.image_timings), 6),
+            'image_timings': self.image_timings,
+            'reports': paths
+        }
+        with open(paths['summary'], 'w') as f:
+            json.dump(summary, f, indent=2)
+        
+        return summary
@@ -5,6 +5,11 @@ OCR Service - Modular service for text extraction from images
 import io
 import json
 import logging
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from google.cloud import vision_v1
@@ -16,12 +21,20 @@ from ocrConfig import (
     get_firebase_credentials,
     get_ocr_config,
     get_storage_path,
+    get_vision_features,
     FIREBASE_PROJECT_ID,
     FIREBASE_STORAGE_BUCKET,
+    STORAGE_PATHS,
     RESULT_CONFIGS,
+    ADAPTIVE_FEATURE_PLAN,
+    ASYNC_FILE_CONFIG,
+    MEMORY_CONFIG,
     ERROR_HANDLING,
-    LOGGING_CONFIG
+    LOGGING_CONFIG,
+    PROFILING_CONFIG
 )
+from ocrProfiler import RunProfiler
+from ocrMemory import get_inflight_budget
 
 
 class OCRService:
@@ -29,24 +42,42 @@ class OCRService:
     Modular OCR Service class for processing images with Google Cloud Vision API
     """
     
-    def __init__(self, config_type="medical_documents"):
+    def __init__(self, config_type="medical_documents", vision_client=None, bucket=None, db=None,
+                 profile=False):
         """
         Initialize OCR Service
         
+        Backends default to Google Cloud Vision and Firebase. Pass a bucket
+        (and optionally vision_client / db) implementing the interfaces in
+        ocrBackends.py to run without Firebase credentials, e.g. the local
+        stand-ins from localBackends.py.
+        
         Args:
             config_type (str): Type of OCR configuration to use
+            vision_client: Optional Vision client (see ocrBackends.VisionClient)
+            bucket: Optional storage bucket (see ocrBackends.StorageBucket)
+            db: Optional Firestore client (see ocrBackends.DocumentStore)
+            profile (bool): Profile runs with cProfile/tracemalloc (see PROFILING_CONFIG)
         """
         self.config_type = config_type
         self.config = get_ocr_config(config_type)
+        self.profile = profile or PROFILING_CONFIG['enabled']
+        self.profiler = None
+        self.last_profile = None
         
         # Setup logging
         self._setup_logging()
         
-        # Initialize Firebase
-        self._initialize_firebase()
+        # Initialize Firebase unless storage was injected
+        if bucket is None:
+            self._initialize_firebase()
+        else:
+            self.bucket = bucket
+            self.db = db if RESULT_CONFIGS['firestore']['enabled'] else None
+            self.logger.info(f"Using injected storage bucket: {bucket.name}")
         
         # Initialize Vision API client
-        self.vision_client = vision_v1.ImageAnnotatorClient()
+        self.vision_client = vision_client or vision_v1.ImageAnnotatorClient()
         
         self.logger.info(f" OCRService initialized with config: {self.config['name']}")
     
@@ -118,7 +149,7 @@ class OCRService:
     
     def list_user_images(self, uid: str, subfolder: Optional[str] = None) -> List[str]:
         """
-        List all images for a user
+        List all images for a user, including multi-page PDF/TIFF files
         
         Args:
             uid (str): User ID
@@ -127,27 +158,46 @@ class OCRService:
         Returns:
             List[str]: List of image file paths
         """
+        return [blob.name for blob in self._list_image_blobs(uid, subfolder)]
+    
+    
+    def _list_image_blobs(self, uid: str, subfolder: Optional[str] = None) -> List:
+        """
+        List the image blobs for a user, keeping their metadata
+        
+        Args:
+            uid (str): User ID
+            subfolder (str): Optional subfolder within images/
+        
+        Returns:
+            List: Storage blobs for images and multi-page files
+        """
         prefix = get_storage_path('images', uid, subfolder)
         self.logger.info(f"Listing images with prefix: {prefix}")
         
         blobs = self.bucket.list_blobs(prefix=prefix)
-        image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp')
+        image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+        image_extensions += tuple(ASYNC_FILE_CONFIG['mime_types'].keys())
         
-        image_paths = [
-            blob.name for blob in blobs 
+        image_blobs = [
+            blob for blob in blobs
             if blob.name.lower().endswith(image_extensions)
         ]
         
-        self.logger.info(f"Found {len(image_paths)} images for user {uid}")
-        return image_paths
+        self.logger.info(f"Found {len(image_blobs)} images for user {uid}")
+        return image_blobs
     
     
-    def extract_text_from_image(self, image_path: str) -> Dict:
+    def extract_text_from_image(self, image_path: str, size: Optional[int] = None) -> Dict:
         """
         Extract text from a single image in Firebase Storage
         
+        Images up to MEMORY_CONFIG['image_uri_threshold'] are downloaded under
+        the in-flight byte budget; larger ones are read by Vision from Storage.
+        
         Args:
             image_path (str): Path to image in Firebase Storage
+            size (int): Image size in bytes from the listing, fetched if omitted
         
         Returns:
             Dict: Extracted text and metadata
@@ -155,58 +205,357 @@ class OCRService:
         try:
             self.logger.info(f"Processing image: {image_path}")
             
-            # Download image from Firebase Storage
             blob = self.bucket.blob(image_path)
-            image_bytes = blob.download_as_bytes()
+            if size is None:
+                blob.reload()
+                size = blob.size
             
-            # Prepare Vision API request
-            image = types.Image(content=image_bytes)
+            # Create request with language hints, built inside the batch the
+            # client sends so it is not copied into one later
+            batch = types.BatchAnnotateImagesRequest(requests=[
+                types.AnnotateImageRequest(
+                    image_context=types.ImageContext(
+                        language_hints=self.config.get('language_hints', ['en'])
+                    )
+                )
+            ])
+            request = batch.requests[0]
+            
+            if size is not None and size > MEMORY_CONFIG['image_uri_threshold']:
+                # Let Vision read large images straight from Storage
+                request.image.source.image_uri = self._gcs_uri(image_path)
+                response = self._annotate_image(batch)
+            else:
+                # The download buffer, the request and the serialized request
+                # all hold the image at once, so budget for every copy
+                reservation = (size or 0) * MEMORY_CONFIG['image_copies']
+                with get_inflight_budget().reserve(reservation, timeout=MEMORY_CONFIG['budget_timeout']):
+                    # Write through the raw message; assigning through the
+                    # proto-plus wrapper makes extra copies of the bytes
+                    types.AnnotateImageRequest.pb(request).image.content = blob.download_as_bytes()
+                    
+                    # Call Vision API with the configured feature plan
+                    response = self._annotate_image(batch)
+                    
+                    # Release the image buffer before formatting
+                    del request, batch
+            
+            # Format result based on config
+            result_format = self.config.get('result_format', 'full')
+            result = self._format_ocr_result(response, image_path, result_format)
+            
+            self.logger.info(f" Successfully processed: {image_path}")
+            return result
+        
+        except Exception as e:
+            self.logger.error(f" Error processing {image_path}: {str(e)}")
+            
+            if ERROR_HANDLING['raise_on_failure']:
+                raise
+            
+            return {
+                'file_path': image_path,
+                'success': False,
+                'error': str(e),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+    
+    
+    def extract_text_from_file(self, file_path: str, uid: str) -> Dict:
+        """
+        Extract text from a multi-page PDF/TIFF in Firebase Storage
+        
+        The file is submitted as a single Vision async file annotation job.
+        Vision writes sharded JSON outputs under the user's results prefix,
+        which are read back page by page and then deleted unless
+        ASYNC_FILE_CONFIG['keep_outputs'] is set.
+        
+        Args:
+            file_path (str): Path to PDF/TIFF in Firebase Storage
+            uid (str): User ID that owns the output prefix
+        
+        Returns:
+            Dict: Extracted text and metadata for the whole file, with a
+                  per-page result for each page under 'pages'
+        """
+        try:
+            self.logger.info(f"Processing multi-page file: {file_path}")
+            
+            extension = os.path.splitext(file_path)[1].lower()
+            file_name = os.path.splitext(os.path.basename(file_path))[0]
+            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+            # Unique per job so concurrent runs on the same file never share shards
+            output_prefix = f"{get_storage_path('vision_output', uid)}{file_name}_{timestamp}_{uuid.uuid4().hex[:8]}/"
             
-            # Use config to determine features
             features = [
-                types.Feature(type_=types.Feature.Type[feature['type_']])
-                for feature in self.config['vision_features']
+                types.Feature(type_=types.Feature.Type[feature_type])
+                for feature_type in get_vision_features(self.config)
             ]
             
-            # Create request with language hints
-            image_context = types.ImageContext(
-                language_hints=self.config.get('language_hints', ['en'])
-            )
-            
-            request = types.AnnotateImageRequest(
-                image=image,
+            request = types.AsyncAnnotateFileRequest(
+                input_config=types.InputConfig(
+                    gcs_source=types.GcsSource(uri=self._gcs_uri(file_path)),
+                    mime_type=ASYNC_FILE_CONFIG['mime_types'][extension]
+                ),
                 features=features,
-                image_context=image_context
+                image_context=types.ImageContext(
+                    language_hints=self.config.get('language_hints', ['en'])
+                ),
+                output_config=types.OutputConfig(
+                    gcs_destination=types.GcsDestination(uri=self._gcs_uri(output_prefix)),
+                    batch_size=ASYNC_FILE_CONFIG['pages_per_output_file']
+                )
             )
             
-            # Call Vision API
-            response = self.vision_client.annotate_image(request)
-            
-            # Check for errors
-            if response.error.message:
-                raise Exception(f"Vision API error: {response.error.message}")
+            # Submit a single server-side job for all pages
+            operation = self.vision_client.async_batch_annotate_files(requests=[request])
             
-            # Format result based on config
+            # Format each page as it is read back from the sharded outputs
             result_format = self.config.get('result_format', 'full')
-            result = self._format_ocr_result(response, image_path, result_format)
+            pages = []
             
-            self.logger.info(f" Successfully processed: {image_path}")
+            try:
+                self._wait_for_operation(operation)
+                
+                for page_number, response in self._iter_file_responses(output_prefix):
+                    if response.error.message:
+                        self.logger.error(f" Vision API error on {file_path} page {page_number}: {response.error.message}")
+                        page = {
+                            'success': False,
+                            'error': f"Vision API error: {response.error.message}"
+                        }
+                    else:
+                        page = self._format_ocr_result(response, file_path, result_format)
+                        del page['file_path'], page['timestamp']
+                    
+                    page['page_number'] = page_number
+                    pages.append(page)
+            finally:
+                # Every job has its own prefix, so kept outputs would pile up per run
+                if not ASYNC_FILE_CONFIG['keep_outputs']:
+                    self._delete_file_outputs(output_prefix)
+            
+            result = self._merge_file_pages(file_path, pages, result_format)
+            
+            self.logger.info(f" Successfully processed {len(pages)} pages: {file_path}")
             return result
         
         except Exception as e:
-            self.logger.error(f" Error processing {image_path}: {str(e)}")
+            self.logger.error(f" Error processing {file_path}: {str(e)}")
             
             if ERROR_HANDLING['raise_on_failure']:
                 raise
             
             return {
-                'file_path': image_path,
+                'file_path': file_path,
                 'success': False,
                 'error': str(e),
                 'timestamp': datetime.utcnow().isoformat()
             }
     
     
+    def _merge_file_pages(self, file_path: str, pages: List[Dict], result_format: str) -> Dict:
+        """
+        Combine per-page results into one result for a multi-page file
+        
+        Args:
+            file_path (str): Original file path
+            pages (List[Dict]): Per-page results in page order
+            result_format (str): Format type (full, text_only, structured)
+        
+        Returns:
+            Dict: File result with merged text and the per-page results
+        """
+        # text_only results carry their text under 'text', the others under 'full_text'
+        text_key = 'text' if result_format == 'text_only' else 'full_text'
+        merged_text = "\n".join(page.get(text_key, '') for page in pages if page['success'])
+        failed_pages = [page['page_number'] for page in pages if not page['success']]
+        
+        result = {
+            'file_path': file_path,
+            'success': len(failed_pages) < len(pages),
+            'timestamp': datetime.utcnow().isoformat(),
+            text_key: merged_text,
+            'text_length': len(merged_text),
+            'num_pages': len(pages),
+            'failed_pages': failed_pages,
+            'pages': pages
+        }
+        
+        if not pages:
+            result['error'] = "Vision file annotation returned no pages"
+        elif not result['success']:
+            result['error'] = "Vision API failed on every page"
+        
+        return result
+    
+    
+    def _is_multipage_file(self, file_path: str) -> bool:
+        """Check whether a file must go through async file annotation"""
+        return file_path.lower().endswith(tuple(ASYNC_FILE_CONFIG['mime_types'].keys()))
+    
+    
+    def _gcs_uri(self, path: str) -> str:
+        """Build a gs:// URI for a path in the Firebase Storage bucket"""
+        return f"gs://{self.bucket.name}/{path}"
+    
+    
+    def _wait_for_operation(self, operation):
+        """
+        Poll an async Vision operation until it completes, backing off between polls
+        
+        Args:
+            operation: Long-running operation returned by async_batch_annotate_files
+        
+        Returns:
+            Operation result
+        """
+        delay = ASYNC_FILE_CONFIG['poll_initial_delay']
+        deadline = time.monotonic() + ASYNC_FILE_CONFIG['poll_timeout']
+        
+        while not operation.done():
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Vision file annotation did not finish within {ASYNC_FILE_CONFIG['poll_timeout']}s")
+            
+            self.logger.info(f"Waiting {delay}s for Vision file annotation")
+            time.sleep(delay)
+            delay = min(delay * ASYNC_FILE_CONFIG['poll_backoff'], ASYNC_FILE_CONFIG['poll_max_delay'])
+        
+        # Raises if the operation finished with an error
+        return operation.result()
+    
+    
+    def _iter_file_responses(self, output_prefix: str):
+        """
+        Stream per-page responses from the sharded async annotation outputs
+        
+        Args:
+            output_prefix (str): Storage prefix Vision wrote its outputs to
+        
+        Yields:
+            Tuple[int, AnnotateImageResponse]: (page number, page response)
+        """
+        blobs = [
+            blob for blob in self.bucket.list_blobs(prefix=output_prefix)
+            if blob.name.endswith('.json')
+        ]
+        
+        # Outputs are named output-1-to-20.json, output-21-to-40.json, ...
+        def first_page(blob):
+            match = re.search(r'output-(\d+)-to-\d+\.json$', blob.name)
+            return int(match.group(1)) if match else 0
+        
+        for blob in sorted(blobs, key=first_page):
+            file_response = types.AnnotateFileResponse.from_json(
+                blob.download_as_bytes(),
+                ignore_unknown_fields=True
+            )
+            
+            for index, response in enumerate(file_response.responses):
+                page_number = response.context.page_number or first_page(blob) + index
+                yield page_number, response
+    
+    
+    def _delete_file_outputs(self, output_prefix: str):
+        """
+        Delete the async annotation outputs under a job's prefix
+        
+        Failures are logged and never fail the file's result.
+        
+        Args:
+            output_prefix (str): Storage prefix Vision wrote its outputs to
+        """
+        try:
+            for blob in self.bucket.list_blobs(prefix=output_prefix):
+                blob.delete()
+        except Exception as e:
+            self.logger.warning(f"Could not delete Vision outputs under {output_prefix}: {str(e)}")
+    
+    
+    def _annotate_image(self, batch):
+        """
+        Call Vision API using the feature plan from configuration
+        
+        With the adaptive plan the cheap detector runs first, and the request
+        is only repeated with the result format's features when the first
+        response looks like a dense document.
+        
+        Args:
+            batch: BatchAnnotateImagesRequest holding one request without features
+        
+        Returns:
+            Vision API response
+        """
+        # Validates the feature plan before any request is made
+        feature_types = get_vision_features(self.config)
+        
+        if self.config.get('feature_plan') == 'adaptive':
+            initial_feature = ADAPTIVE_FEATURE_PLAN['initial_feature']
+            response = self._call_vision(batch, [initial_feature])
+            
+            if not self._needs_document_detection(response):
+                return response
+            
+            self.logger.info("Escalating to document text detection")
+        
+        return self._call_vision(batch, feature_types)
+    
+    
+    def _call_vision(self, batch, feature_types: List[str]):
+        """
+        Run a Vision API request with the given feature types
+        
+        Args:
+            batch: BatchAnnotateImagesRequest holding one request
+            feature_types (List[str]): Vision feature type names
+        
+        Returns:
+            Vision API response
+        """
+        batch.requests[0].features = [
+            types.Feature(type_=types.Feature.Type[feature_type])
+            for feature_type in feature_types
+        ]
+        
+        response = self.vision_client.batch_annotate_images(request=batch).responses[0]
+        
+        # Check for errors
+        if response.error.message:
+            raise Exception(f"Vision API error: {response.error.message}")
+        
+        return response
+    
+    
+    def _needs_document_detection(self, response) -> bool:
+        """
+        Decide whether a TEXT_DETECTION response should be escalated
+        
+        Args:
+            response: Vision API response from the initial detector
+        
+        Returns:
+            bool: True if block density or confidence calls for document detection
+        """
+        if not response.full_text_annotation:
+            return False
+        
+        confidences = [
+            block.confidence
+            for page in response.full_text_annotation.pages
+            for block in page.blocks
+        ]
+        
+        if len(confidences) >= ADAPTIVE_FEATURE_PLAN['escalate_min_blocks']:
+            return True
+        
+        # Blocks without a reported confidence don't count against the page
+        reported = [confidence for confidence in confidences if confidence > 0]
+        if reported and sum(reported) / len(reported) < ADAPTIVE_FEATURE_PLAN['escalate_min_confidence']:
+            return True
+        
+        return False
+    
+    
     def _format_ocr_result(self, response, image_path: str, result_format: str) -> Dict:
         """
         Format OCR result based on configuration
@@ -318,8 +667,10 @@ class OCRService:
         """
         self.logger.info(f" Starting batch processing for user: {uid}")
         
-        # Get list of images
-        image_paths = self.list_user_images(uid, subfolder)
+        # Get list of images, keeping the listed sizes for the in-flight byte budget
+        image_blobs = self._list_image_blobs(uid, subfolder)
+        image_sizes = {blob.name: blob.size for blob in image_blobs}
+        image_paths = [blob.name for blob in image_blobs]
         
         if not image_paths:
             self.logger.warning(f"No images found for user {uid}")
@@ -338,13 +689,59 @@ class OCRService:
             self.logger.info(f"Processing batch {i//batch_size + 1}: {len(batch)} images")
             
             for image_path in batch:
-                result = self.extract_text_from_image(image_path)
-                results.append(result)
+                results.append(self._process_image(image_path, uid, image_sizes.get(image_path)))
         
         self.logger.info(f" Completed processing {len(results)} images for user {uid}")
         return results
     
     
+    def process_latest_medical_report(self, uid: str) -> Dict:
+        """
+        Process the latest image in the user's medical report folder
+        
+        Args:
+            uid (str): User ID
+        
+        Returns:
+            Dict: OCR result for the latest image
+        """
+        subfolder = STORAGE_PATHS['medical_report_subfolder']
+        
+        with self._profile_run(f"{uid}_latest_report"):
+            blobs = self._list_image_blobs(uid, subfolder)
+            
+            if not blobs:
+                raise ValueError("No images found to process")
+            
+            # Newest first by creation time, like the Node /api/process-ocr route
+            def created_at(blob):
+                created = blob.time_created or blob.updated
+                return created.timestamp() if created else 0
+            
+            latest = max(blobs, key=created_at)
+            self.logger.info(f"Processing latest medical report: {latest.name}")
+            
+            return self._process_image(latest.name, uid, latest.size)
+    
+    
+    def _process_image(self, image_path: str, uid: str, size: Optional[int] = None) -> Dict:
+        """
+        Process one image or multi-page file, sampling its timing when profiling
+        
+        Args:
+            image_path (str): Path to image in Firebase Storage
+            uid (str): User ID
+            size (int): Image size in bytes, if known
+        
+        Returns:
+            Dict: OCR result for the file
+        """
+        with self._sample_image(image_path):
+            if self._is_multipage_file(image_path):
+                return self.extract_text_from_file(image_path, uid)
+            return self.extract_text_from_image(image_path, size)
+    
+    
     def save_results_to_firestore(self, uid: str, results: List[Dict]) -> bool:
         """
         Save OCR results to Firestore
@@ -452,24 +849,75 @@ class OCRService:
         """
         self.logger.info(f"🚀 Starting complete OCR workflow for user: {uid}")
         
-        # Process images
-        results = self.process_user_images(uid, subfolder, max_images)
-        
-        if not results:
-            self.logger.warning("No results to save")
-            return results, False
-        
-        # Save to Firestore
-        firestore_success = self.save_results_to_firestore(uid, results)
-        
-        # Save JSON backup if enabled
-        self.save_results_to_json(uid, results)
+        with self._profile_run(f"{uid}_ocr"):
+            # Process images
+            results = self.process_user_images(uid, subfolder, max_images)
+            
+            if not results:
+                self.logger.warning("No results to save")
+                return results, False
+            
+            # Save to Firestore
+            firestore_success = self.save_results_to_firestore(uid, results)
+            
+            # Save JSON backup if enabled
+            self.save_results_to_json(uid, results)
         
         self.logger.info(f" OCR workflow complete for user {uid}")
         # Return True if OCR processing succeeded, regardless of storage status
         return results, True
 
 
+    @contextmanager
+    def _profile_run(self, label: str):
+        """
+        Profile the enclosed run when profiling is enabled
+        
+        Hotspot and memory reports are written next to the results; their
+        paths and the per-image timings end up in self.last_profile.
+        
+        Args:
+            label (str): Prefix for report file names
+        """
+        if not self.profile or self.profiler is not None:
+            yield
+            return
+        
+        output_dir = PROFILING_CONFIG['output_dir'] or RESULT_CONFIGS['json_backup']['output_dir']
+        profiler = RunProfiler(
+            output_dir,
+            label,
+            sort_key=PROFILING_CONFIG['sort_key'],
+            top_n=PROFILING_CONFIG['top_n'],
+            memory_top_n=PROFILING_CONFIG['memory_top_n'],
+            tracemalloc_frames=PROFILING_CONFIG['tracemalloc_frames'],
+            sample_images=PROFILING_CONFIG['sample_image_timing']
+        )
+        
+        self.profiler = profiler
+        self.last_profile = None
+        profiler.start()
+        
+        try:
+            yield
+        finally:
+            self.profiler = None
+            
+            # A failed report must not fail a run that succeeded
+            try:
+                self.last_profile = profiler.stop()
+                self.logger.info(f" Profile reports written to: {output_dir}")
+            except Exception as e:
+                self.logger.error(f" Error writing profile reports: {str(e)}")
+    
+    
+    def _sample_image(self, image_path: str):
+        """Per-image CPU vs wall timing while a profiled run is active"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.image(image_path)
+
+
 # Convenience function for quick processing
 def process_user_ocr(uid: str, config_type: str = "medical_documents", 
                      subfolder: Optional[str] = None) -> List[Dict]:
@@ -502,12 +950,32 @@ if __name__ == "__main__":
     parser.add_argument('--subfolder', type=str, help='Subfolder within images/')
     parser.add_argument('--max-images', type=int, help='Maximum number of images to process')
     parser.add_argument('--test', action='store_true', help='Run in test mode (just list images)')
+    parser.add_argument('--fixtures-dir', type=str,
+                       help='Run against local stand-in backends serving this directory (no credentials needed)')
+    parser.add_argument('--vision-error-rate', type=float, default=0.0,
+                       help='With --fixtures-dir: injected Vision error rate (0-1)')
+    parser.add_argument('--storage-error-rate', type=float, default=0.0,
+                       help='With --fixtures-dir: injected Storage error rate (0-1)')
+    parser.add_argument('--firestore-error-rate', type=float, default=0.0,
+                       help='With --fixtures-dir: injected Firestore error rate (0-1)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile the run and write hotspot/memory reports next to the results')
     
     args = parser.parse_args()
     
     try:
         # Initialize service
-        service = OCRService(config_type=args.config_type)
+        backends = {}
+        if args.fixtures_dir:
+            from localBackends import build_local_backends
+            backends = build_local_backends(
+                args.fixtures_dir,
+                vision_error_rate=args.vision_error_rate,
+                storage_error_rate=args.storage_error_rate,
+                firestore_error_rate=args.firestore_error_rate
+            )
+        
+        service = OCRService(config_type=args.config_type, profile=args.profile, **backends)
         
         if args.test:
             # Test mode: just list images
@@ -534,6 +1002,9 @@ if __name__ == "__main__":
                 'num_results': len(results),
                 'results': results
             }
+            
+            if service.last_profile:
+                result['profile'] = service.last_profile
         
         # Output JSON for Node.js to parse
         print(json.dumps(result, indent=2))
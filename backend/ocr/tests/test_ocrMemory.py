@@ -0,0 +1,111 @@
+"""
+Tests for the in-flight image byte budget
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+# Add parent directory to path to import ocrMemory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocrMemory import ByteBudget
+
+
+class ByteBudgetTest(unittest.TestCase):
+    
+    def _reserve_in_thread(self, budget, num_bytes, timeout=None):
+        """Start a thread holding a reservation until released; returns (acquired, release, thread)"""
+        acquired = threading.Event()
+        release = threading.Event()
+        
+        def hold():
+            with budget.reserve(num_bytes, timeout=timeout):
+                acquired.set()
+                release.wait(5)
+        
+        thread = threading.Thread(target=hold, daemon=True)
+        thread.start()
+        return acquired, release, thread
+    
+    
+    def test_reservation_is_released_after_block(self):
+        budget = ByteBudget(100)
+        
+        with budget.reserve(60):
+            self.assertEqual(budget.in_use, 60)
+        
+        self.assertEqual(budget.in_use, 0)
+    
+    
+    def test_reservation_is_released_on_error(self):
+        budget = ByteBudget(100)
+        
+        with self.assertRaises(RuntimeError):
+            with budget.reserve(60):
+                raise RuntimeError("annotate failed")
+        
+        self.assertEqual(budget.in_use, 0)
+    
+    
+    def test_blocks_until_budget_is_free(self):
+        budget = ByteBudget(100)
+        
+        with budget.reserve(70):
+            acquired, release, thread = self._reserve_in_thread(budget, 50)
+            self.assertFalse(acquired.wait(0.2))
+            self.assertEqual(budget.in_use, 70)
+        
+        self.assertTrue(acquired.wait(2))
+        self.assertEqual(budget.in_use, 50)
+        
+        release.set()
+        thread.join(2)
+        self.assertEqual(budget.in_use, 0)
+    
+    
+    def test_times_out_without_reserving(self):
+        budget = ByteBudget(100)
+        
+        with budget.reserve(70):
+            with self.assertRaises(TimeoutError):
+                with budget.reserve(50, timeout=0.1):
+                    self.fail("reservation should not be granted")
+            
+            self.assertEqual(budget.in_use, 70)
+        
+        self.assertEqual(budget.in_use, 0)
+    
+    
+    def test_oversized_reservation_is_capped_at_limit(self):
+        budget = ByteBudget(100)
+        
+        # Larger than the whole budget: granted once nothing else is in flight
+        with budget.reserve(500, timeout=1):
+            self.assertEqual(budget.in_use, 100)
+            
+            with self.assertRaises(TimeoutError):
+                with budget.reserve(1, timeout=0.1):
+                    pass
+        
+        self.assertEqual(budget.in_use, 0)
+    
+    
+    def test_oversized_reservation_waits_for_others_to_drain(self):
+        budget = ByteBudget(100)
+        
+        with budget.reserve(10):
+            acquired, release, thread = self._reserve_in_thread(budget, 500)
+            self.assertFalse(acquired.wait(0.2))
+        
+        self.assertTrue(acquired.wait(2))
+        self.assertEqual(budget.in_use, 100)
+        
+        release.set()
+        thread.join(2)
+        self.assertEqual(budget.in_use, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+"""
+Tests for OCRService on the local stand-in backends
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import OCRService
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud.vision_v1 import types
+
+from ocrConfig import ADAPTIVE_FEATURE_PLAN, ASYNC_FILE_CONFIG, FEATURE_PLANS, OCR_CONFIGS
+from ocrService import OCRService
+from localBackends import LocalBucket, LocalVisionClient, LocalFirestore, build_synthetic_response
+
+
+IMAGE_PATH = "test_user/images/scan.jpg"
+FILE_PATH = "test_user/images/report.pdf"
+OUTPUT_PREFIX = "test_user/ocr_results/vision_output/report_job/"
+
+
+class RecordingVisionClient(LocalVisionClient):
+    """LocalVisionClient that records the feature types of every request"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requested_features = []
+    
+    
+    def annotate_image(self, request, **kwargs):
+        self.requested_features.append([feature.type_.name for feature in request.features])
+        return super().annotate_image(request, **kwargs)
+
+
+class OCRServiceTestCase(unittest.TestCase):
+    """Builds an OCRService over a temporary fixtures directory"""
+    
+    def setUp(self):
+        self.fixtures_dir = tempfile.mkdtemp(prefix='ocr_test_')
+        self.addCleanup(shutil.rmtree, self.fixtures_dir, True)
+        
+        image_file = os.path.join(self.fixtures_dir, *IMAGE_PATH.split('/'))
+        os.makedirs(os.path.dirname(image_file))
+        with open(image_file, 'wb') as f:
+            f.write(b'synthetic image bytes')
+        with open(os.path.join(os.path.dirname(image_file), 'report.pdf'), 'wb') as f:
+            f.write(b'synthetic pdf bytes')
+        
+        self.bucket = LocalBucket(self.fixtures_dir)
+    
+    
+    def build_service(self, vision_client=None, **config) -> OCRService:
+        service = OCRService(
+            vision_client=vision_client or LocalVisionClient(bucket=self.bucket),
+            bucket=self.bucket,
+            db=LocalFirestore()
+        )
+        service.config = dict(service.config, **config)
+        service.logger.disabled = True
+        return service
+
+
+class AdaptiveFeaturePlanTest(OCRServiceTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.service = self.build_service(feature_plan='adaptive')
+    
+    
+    def test_escalates_on_many_blocks(self):
+        response = build_synthetic_response(num_blocks=ADAPTIVE_FEATURE_PLAN['escalate_min_blocks'], seed=0)
+        self.assertTrue(self.service._needs_document_detection(response))
+    
+    
+    def test_keeps_few_confident_blocks(self):
+        response = build_synthetic_response(
+            num_blocks=ADAPTIVE_FEATURE_PLAN['escalate_min_blocks'] - 1,
+            confidence=ADAPTIVE_FEATURE_PLAN['escalate_min_confidence'],
+            seed=0
+        )
+        self.assertFalse(self.service._needs_document_detection(response))
+    
+    
+    def test_escalates_on_low_confidence(self):
+        response = build_synthetic_response(
+            num_blocks=2,
+            confidence=ADAPTIVE_FEATURE_PLAN['escalate_min_confidence'] - 0.05,
+            seed=0
+        )
+        self.assertTrue(self.service._needs_document_detection(response))
+    
+    
+    def test_ignores_blocks_without_confidence(self):
+        response = build_synthetic_response(num_blocks=2, confidence=0.0, seed=0)
+        self.assertFalse(self.service._needs_document_detection(response))
+    
+    
+    def test_keeps_empty_response(self):
+        response = build_synthetic_response(num_blocks=0, seed=0)
+        self.assertFalse(self.service._needs_document_detection(response))
+    
+    
+    def test_sparse_image_makes_one_call(self):
+        vision_client = RecordingVisionClient(bucket=self.bucket, synthetic_blocks=2)
+        service = self.build_service(vision_client, feature_plan='adaptive')
+        
+        result = service.extract_text_from_image(IMAGE_PATH)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(vision_client.requested_features, [[ADAPTIVE_FEATURE_PLAN['initial_feature']]])
+    
+    
+    def test_dense_image_escalates_to_format_plan(self):
+        vision_client = RecordingVisionClient(
+            bucket=self.bucket,
+            synthetic_blocks=ADAPTIVE_FEATURE_PLAN['escalate_min_blocks']
+        )
+        service = self.build_service(vision_client, feature_plan='adaptive', result_format='full')
+        
+        result = service.extract_text_from_image(IMAGE_PATH)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(vision_client.requested_features, [
+            [ADAPTIVE_FEATURE_PLAN['initial_feature']],
+            FEATURE_PLANS['full']
+        ])
+    
+    
+    def test_format_plan_makes_one_call(self):
+        vision_client = RecordingVisionClient(
+            bucket=self.bucket,
+            synthetic_blocks=ADAPTIVE_FEATURE_PLAN['escalate_min_blocks']
+        )
+        service = self.build_service(vision_client, feature_plan='format', result_format='text_only')
+        
+        service.extract_text_from_image(IMAGE_PATH)
+        
+        self.assertEqual(vision_client.requested_features, [FEATURE_PLANS['text_only']])
+    
+    
+    def test_unknown_feature_plan_fails_at_construction(self):
+        original = OCR_CONFIGS['medical_documents']
+        OCR_CONFIGS['medical_documents'] = dict(original, feature_plan='adaptve')
+        self.addCleanup(OCR_CONFIGS.__setitem__, 'medical_documents', original)
+        
+        with self.assertRaises(ValueError):
+            OCRService(bucket=self.bucket, vision_client=LocalVisionClient(bucket=self.bucket))
+
+
+
+def page_response(text: str, page_number: int = 0):
+    """Build a per-page response as Vision writes it into a file annotation shard"""
+    response = types.AnnotateImageResponse(full_text_annotation=types.TextAnnotation(text=text))
+    if page_number:
+        response.context = types.ImageAnnotationContext(page_number=page_number)
+    return response
+
+
+class FileResponseShardTest(OCRServiceTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.service = self.build_service()
+    
+    
+    def write_shard(self, name: str, responses):
+        file_response = types.AnnotateFileResponse(responses=responses, total_pages=len(responses))
+        self.bucket.blob(f"{OUTPUT_PREFIX}{name}").upload_from_string(
+            types.AnnotateFileResponse.to_json(file_response),
+            content_type='application/json'
+        )
+    
+    
+    def read_pages(self):
+        return [
+            (page_number, response.full_text_annotation.text)
+            for page_number, response in self.service._iter_file_responses(OUTPUT_PREFIX)
+        ]
+    
+    
+    def test_shards_are_read_in_page_order(self):
+        # Lexicographic order would put output-21 before output-3
+        self.write_shard('output-21-to-22.json', [page_response('p21', 21), page_response('p22', 22)])
+        self.write_shard('output-3-to-4.json', [page_response('p3', 3), page_response('p4', 4)])
+        self.write_shard('output-1-to-2.json', [page_response('p1', 1), page_response('p2', 2)])
+        
+        self.assertEqual(self.read_pages(), [
+            (1, 'p1'), (2, 'p2'), (3, 'p3'), (4, 'p4'), (21, 'p21'), (22, 'p22')
+        ])
+    
+    
+    def test_page_number_falls_back_to_shard_start(self):
+        self.write_shard('output-5-to-6.json', [page_response('p5'), page_response('p6')])
+        
+        self.assertEqual(self.read_pages(), [(5, 'p5'), (6, 'p6')])
+    
+    
+    def test_ignores_non_json_outputs(self):
+        self.write_shard('output-1-to-1.json', [page_response('p1', 1)])
+        self.bucket.blob(f"{OUTPUT_PREFIX}notes.txt").upload_from_string('not a shard')
+        
+        self.assertEqual(self.read_pages(), [(1, 'p1')])
+    
+    
+    def test_outputs_are_deleted_after_reading(self):
+        vision_client = LocalVisionClient(bucket=self.bucket, file_pages=3)
+        service = self.build_service(vision_client)
+        
+        result = service.extract_text_from_file(FILE_PATH, 'test_user')
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['num_pages'], 3)
+        self.assertEqual(self.bucket.list_blobs(prefix='test_user/ocr_results/'), [])
+    
+    
+    def test_outputs_are_kept_when_configured(self):
+        original = ASYNC_FILE_CONFIG['keep_outputs']
+        ASYNC_FILE_CONFIG['keep_outputs'] = True
+        self.addCleanup(ASYNC_FILE_CONFIG.__setitem__, 'keep_outputs', original)
+        
+        vision_client = LocalVisionClient(bucket=self.bucket, file_pages=3)
+        self.build_service(vision_client).extract_text_from_file(FILE_PATH, 'test_user')
+        
+        self.assertEqual(len(self.bucket.list_blobs(prefix='test_user/ocr_results/')), 1)
+
+
+class MergeFilePagesTest(OCRServiceTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.service = self.build_service()
+    
+    
+    def page(self, page_number: int, text: str = None):
+        if text is None:
+            return {'page_number': page_number, 'success': False, 'error': 'Vision API error: failed'}
+        return {'page_number': page_number, 'success': True, 'full_text': text}
+    
+    
+    def test_partial_failure_keeps_successful_pages(self):
+        pages = [self.page(1, 'first'), self.page(2), self.page(3, 'third')]
+        
+        result = self.service._merge_file_pages(FILE_PATH, pages, 'full')
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['failed_pages'], [2])
+        self.assertEqual(result['full_text'], 'first\nthird')
+        self.assertEqual(result['num_pages'], 3)
+        self.assertNotIn('error', result)
+    
+    
+    def test_all_pages_failed(self):
+        result = self.service._merge_file_pages(FILE_PATH, [self.page(1), self.page(2)], 'full')
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(result['failed_pages'], [1, 2])
+        self.assertEqual(result['full_text'], '')
+        self.assertIn('every page', result['error'])
+    
+    
+    def test_no_pages_returned(self):
+        result = self.service._merge_file_pages(FILE_PATH, [], 'full')
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(result['num_pages'], 0)
+        self.assertEqual(result['failed_pages'], [])
+        self.assertIn('no pages', result['error'])
+    
+    
+    def test_text_only_merges_text_key(self):
+        pages = [
+            {'page_number': 1, 'success': True, 'text': 'first'},
+            {'page_number': 2, 'success': True, 'text': 'second'}
+        ]
+        
+        result = self.service._merge_file_pages(FILE_PATH, pages, 'text_only')
+        
+        self.assertEqual(result['text'], 'first\nsecond')
+        self.assertNotIn('full_text', result)
+
+
+if __name__ == "__main__":
+    unittest.main()